@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+# Compare the memory of JokeGenerator.jokes as a list of Joke objects and as a JokeTable.
+# Usage: python benchmarks/bench_memory.py [--scale 10000]
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from joke import JokeGenerator
+
+
+def scale_csv(infile: str, outfile: str, scale: int) -> int:
+    """Write the rows of the infile scale times to the outfile, return the number of rows"""
+    with open(infile, "r") as file:
+        rows = list(csv.reader(file, delimiter=','))
+    with open(outfile, "w", newline="") as file:
+        writer = csv.writer(file)
+        for _ in range(scale):
+            writer.writerows(rows)
+    return len(rows) * scale
+
+
+def measure(filename: str, compact: bool) -> int:
+    """Memory in bytes that is still allocated after loading all jokes of the file"""
+    tracemalloc.start()
+    gen = JokeGenerator(filename, compact=compact)
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del gen
+    return current
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--infile", default="reddit_dadjokes.csv")
+    parser.add_argument("--scale", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "jokes.csv")
+        num_rows = scale_csv(args.infile, filename, args.scale)
+        size = os.path.getsize(filename)
+        print(f"{num_rows} jokes, {size / 2**20:.1f} MiB on disk")
+        for compact in (False, True):
+            used = measure(filename, compact)
+            name = "JokeTable" if compact else "list of Joke"
+            print(f"{name:>14}: {used / 2**20:8.1f} MiB ({used / size:.2f}x the file, {used / num_rows:.0f} bytes per joke)")
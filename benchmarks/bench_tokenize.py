@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+# Tokens per second of the old sentence splitting and tokenization, compared to split_and_tokenize and tokenize_flat.
+# Usage: python benchmarks/bench_tokenize.py [--repeat 200]
+
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from joke import split_and_tokenize, tokenize_flat
+
+
+def old_split_and_tokenize(text: str) -> Tuple[List[str], List[List[str]]]:
+    """Joke.split_into_sentences and Joke._tokenize as they were before the patterns were compiled"""
+    sentences = re.findall(r' ?([^.!?\n]+[.?!]*|\n)', text)
+    tokens = []
+    for sentence in sentences:
+        tokens.append(re.findall(r'([\w\']+|\?|\.|\n|,|!)', sentence))
+    return sentences, tokens
+
+
+def tokens_per_second(tokenize, texts: List[str], num_tokens: int) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        tokenize(text)
+    return num_tokens / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--infile", default="reddit_dadjokes.csv")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.infile, "r") as file:
+        texts = [row[2] for row in csv.reader(file, delimiter=',')] * args.repeat
+    num_tokens = sum(len(tokens) for text in texts for tokens in split_and_tokenize(text)[1])
+    print(f"{len(texts)} jokes, {num_tokens} tokens")
+
+    for name, tokenize in [("before", old_split_and_tokenize), ("split_and_tokenize", split_and_tokenize),
+                           ("tokenize_flat", tokenize_flat)]:
+        print(f"{name:>18}: {tokens_per_second(tokenize, texts, num_tokens) / 1e6:6.2f} M tokens/s")
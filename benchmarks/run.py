@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+# Time and peak memory of every stage of the joke pipeline on synthetic corpora made from reddit_dadjokes.csv.
+# The results are written as json, so two commits can be compared.
+# Usage: python benchmarks/run.py [--sizes 1000,10000,100000] [--output results.json] [--no-memory]
+#
+# Peak memory is measured with tracemalloc in a second run of every stage, so the timings are not slowed down by
+# it. Memory allocated inside lxml is not seen by tracemalloc.
+
+import argparse
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List, Dict, Callable
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from joke import JokeGenerator
+from distance import edit_distance, edit_distance_one_to_many
+
+# How many jokes are compared with edit_distance, the comparison is quadratic in the length of the jokes
+EDIT_DISTANCE_JOKES = 1000
+
+
+def make_corpus(infile: str, outfile: str, size: int) -> None:
+    """Write size jokes to the outfile, repeating the rows of the infile"""
+    with open(infile, "r") as file:
+        rows = list(csv.reader(file, delimiter=','))
+    with open(outfile, "w", newline="") as file:
+        writer = csv.writer(file)
+        for i in range(size):
+            writer.writerow(rows[i % len(rows)])
+
+
+def pipeline(corpus: str, workdir: str) -> List[tuple]:
+    """The stages in the order they run, every stage is a (name, function) pair"""
+    state = {}
+    xml_file = os.path.join(workdir, "jokes.xml")
+    json_file = os.path.join(workdir, "jokes.json")
+    jsonl_file = os.path.join(workdir, "jokes.jsonl")
+
+    def load_csv():
+        state["gen"] = JokeGenerator(corpus)
+
+    def tokenize():
+        for joke in state["gen"].jokes:
+            joke.tokenized_joke
+
+    def filter_profanity():
+        for joke in state["gen"].jokes:
+            joke.filtered_joke
+
+    def tokens(joke) -> List[str]:
+        return ["#"] + [token for sentence in joke.tokenized_joke for token in sentence]
+
+    def distance():
+        jokes = state["gen"].jokes[:EDIT_DISTANCE_JOKES]
+        target = tokens(jokes[0])
+        for joke in jokes:
+            edit_distance(target, tokens(joke))
+
+    def distance_batch():
+        jokes = state["gen"].jokes[:EDIT_DISTANCE_JOKES]
+        edit_distance_one_to_many(tokens(jokes[0]), [tokens(joke) for joke in jokes])
+
+    return [
+        ("csv_load", load_csv),
+        ("tokenize", tokenize),
+        ("profanity_filter", filter_profanity),
+        ("xml_export", lambda: state["gen"].save_jokes_xml(xml_file)),
+        ("json_export", lambda: state["gen"].save_jokes_json(json_file)),
+        ("json_export_compact", lambda: state["gen"].save_jokes_json(json_file + ".compact", json_format="compact")),
+        ("jsonl_export", lambda: state["gen"].save_jokes_json(jsonl_file)),
+        ("edit_distance", distance),
+        ("edit_distance_batch", distance_batch),
+        ("json_load", lambda: JokeGenerator(json_file)),
+        ("jsonl_load", lambda: JokeGenerator(jsonl_file)),
+        ("xml_load", lambda: JokeGenerator(xml_file)),
+    ]
+
+
+def run_stages(corpus: str, workdir: str, measure: Callable[[Callable], Dict]) -> Dict[str, Dict]:
+    return {name: measure(stage) for name, stage in pipeline(corpus, workdir)}
+
+
+def timed(stage: Callable) -> Dict:
+    start = time.perf_counter()
+    stage()
+    return {"seconds": time.perf_counter() - start}
+
+
+def traced(stage: Callable) -> Dict:
+    tracemalloc.start()
+    stage()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"peak_bytes": peak}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--infile", default=os.path.join(ROOT, "reddit_dadjokes.csv"))
+    parser.add_argument("--sizes", default="1000,10000", help="comma separated numbers of jokes, up to 10000000")
+    parser.add_argument("--output", help="json file for the results, default is stdout")
+    parser.add_argument("--no-memory", action="store_true", help="only measure the time")
+    args = parser.parse_args()
+
+    results = []
+    # profanities.txt is read relative to the working directory
+    os.chdir(ROOT)
+    for size in [int(size) for size in args.sizes.split(",")]:
+        with tempfile.TemporaryDirectory() as workdir:
+            corpus = os.path.join(workdir, "jokes.csv")
+            make_corpus(args.infile, corpus, size)
+            times = run_stages(corpus, workdir, timed)
+            memory = {} if args.no_memory else run_stages(corpus, workdir, traced)
+        for stage, result in times.items():
+            results.append({"size": size, "stage": stage, **result, **memory.get(stage, {})})
+            print(f"{size:>9} {stage:<20} {result['seconds']:9.3f} s", file=sys.stderr)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
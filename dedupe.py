@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+# Finding reposted jokes: MinHash signatures over word shingles, locality sensitive hashing to find the candidate
+# pairs without comparing every joke with every other, and edit_distance to confirm them.
+
+import hashlib
+import random
+from collections import defaultdict
+from typing import List, Tuple, Set, Sequence, Iterator
+
+from distance import edit_distance
+
+# Mersenne prime, larger than the 64 bit hashes are reduced to
+PRIME = (1 << 61) - 1
+
+
+def shingles(tokenized_joke: List[List[str]], size: int = 3) -> Set[Tuple[str, ...]]:
+    """All runs of size words of the joke, lower cased and without punctuation"""
+    words = [token.lower() for sentence in tokenized_joke for token in sentence if token[0].isalnum()]
+    if len(words) <= size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures with num_perm hash functions, compared in bands for locality sensitive hashing"""
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm has to be a multiple of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self.permutations = [(rng.randrange(1, PRIME), rng.randrange(PRIME)) for _ in range(num_perm)]
+
+    def signature(self, shingle_set: Set[Tuple[str, ...]]) -> Tuple[int, ...]:
+        # hash() is salted per process, blake2b gives the same signature in every run
+        hashes = [int.from_bytes(hashlib.blake2b(" ".join(shingle).encode("utf-8"), digest_size=8).digest(), "little")
+                  for shingle in shingle_set]
+        return tuple(min((a * h + b) % PRIME for h in hashes) for a, b in self.permutations)
+
+    def buckets(self, signatures: Sequence[Tuple[int, ...]]) -> Iterator[List[int]]:
+        """For every band, the groups of (more than one) positions whose signatures agree in that band"""
+        for band in range(self.bands):
+            buckets = defaultdict(list)
+            start = band * self.rows
+            for position, signature in enumerate(signatures):
+                buckets[signature[start:start + self.rows]].append(position)
+            yield from (bucket for bucket in buckets.values() if len(bucket) > 1)
+
+
+def duplicate_groups(tokenized_jokes: Sequence[List[List[str]]], max_distance: float = 0.5,
+                     hasher: MinHasher = None) -> List[List[int]]:
+    """Groups of positions of jokes that are near duplicates of each other.
+    A candidate pair counts as duplicate if its edit distance is at most max_distance per token"""
+    hasher = hasher or MinHasher()
+    signatures = [hasher.signature(shingles(tokenized_joke)) for tokenized_joke in tokenized_jokes]
+    token_lists = [["#"] + [token for sentence in tokenized_joke for token in sentence]
+                   for tokenized_joke in tokenized_jokes]
+
+    # Union-find over the confirmed pairs
+    parents = list(range(len(tokenized_jokes)))
+
+    def find(position: int) -> int:
+        while parents[position] != position:
+            parents[position] = parents[parents[position]]
+            position = parents[position]
+        return position
+
+    # Every member of a bucket is only compared with the first one, not with all the others, so a large cluster of
+    # reposts costs time proportional to its size
+    for bucket in hasher.buckets(signatures):
+        first = bucket[0]
+        for second in bucket[1:]:
+            if find(first) == find(second):
+                continue
+            length = max(len(token_lists[first]), len(token_lists[second])) - 1
+            if edit_distance(token_lists[first], token_lists[second]) <= max_distance * length:
+                parents[find(second)] = find(first)
+
+    groups = defaultdict(list)
+    for position in range(len(tokenized_jokes)):
+        groups[find(position)].append(position)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def dedupe(jokes: Sequence, max_distance: float = 0.5) -> List[int]:
+    """Positions of the jokes to keep: of every group of near duplicates only the one with the highest rating
+    (the first one if they are rated the same). The positions stay in their original order"""
+    dropped = set()
+    for group in duplicate_groups([joke.tokenized_joke for joke in jokes], max_distance):
+        best = max(group, key=lambda position: (jokes[position].rating, -position))
+        dropped.update(position for position in group if position != best)
+    return [position for position in range(len(jokes)) if position not in dropped]
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+# Weighted edit distance between token lists. The first token of both lists stands for "#", the empty prefix.
+#
+# Cost model: moving right in the first row costs 3.0, moving down in the first column 2.0. Inside the grid a
+# cell takes the cheapest neighbour (left, up or diagonal); different tokens add 2.0 below the diagonal, 3.0 above
+# it, and a substitution cost on the diagonal and in the last cell: 0.5 for two digits, 0.1 for two punctuation
+# tokens, 4.0 if one token is not ascii and 1.3 otherwise.
+
+import string
+from typing import List, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DIGIT = 1
+PUNCTUATION = 2
+NON_ASCII = 4
+
+
+def token_class(token: str) -> int:
+    """The properties of a token that the substitution cost depends on, as bit flags"""
+    return ((DIGIT if token.isdigit() else 0)
+            | (PUNCTUATION if token in string.punctuation else 0)
+            | (NON_ASCII if not token.isascii() else 0))
+
+
+def _substitution_cost(source_class: int, target_class: int) -> float:
+    if source_class & target_class & DIGIT:
+        return 0.5
+    if source_class & target_class & PUNCTUATION:
+        return 0.1
+    if (source_class | target_class) & NON_ASCII:
+        return 4.0
+    return 1.3
+
+
+# Substitution cost for every pair of classes, indexed by source_class * 8 + target_class
+SUBSTITUTION_COSTS = [_substitution_cost(source_class, target_class)
+                      for source_class in range(8) for target_class in range(8)]
+
+
+def edit_distance(target_list: List[str], source_list: List[str]) -> float:
+    """Weighted edit distance, keeping only the previous and the current row of the grid"""
+    m = len(target_list)
+    n = len(source_list)
+    if not m or not n:
+        raise ValueError("Both token lists need at least the '#' token")
+    target_classes = [token_class(token) for token in target_list]
+
+    previous = [0] + [3.0 * i for i in range(1, m)]
+    for j in range(1, n):
+        source = source_list[j]
+        source_class = token_class(source)
+        costs = SUBSTITUTION_COSTS[source_class * 8:source_class * 8 + 8]
+        last_row = j == n - 1
+        current = [2.0 * j]
+        for i in range(1, m):
+            minimum = min(current[i - 1], previous[i], previous[i - 1])
+            if source == target_list[i]:
+                current.append(minimum)
+            elif (not last_row or i < m - 1) and j > i:
+                current.append(minimum + 2.0)
+            elif (not last_row or i < m - 1) and j < i:
+                current.append(minimum + 3.0)
+            else:
+                current.append(minimum + costs[target_classes[i]])
+        previous = current
+    return round(previous[m - 1], 1)
+
+
+def _edit_distance_pairs(target_lists: Sequence[List[str]], source_lists: Sequence[List[str]],
+                         batch_size: int = 512) -> List[float]:
+    """Edit distance of every pair (target_lists[b], source_lists[b]). With numpy, pairs of similar size are
+    computed together in batches, so little time is spent on the padding"""
+    if np is None:
+        return [edit_distance(target, source) for target, source in zip(target_lists, source_lists)]
+    if any(not target for target in target_lists) or any(not source for source in source_lists):
+        raise ValueError("Both token lists need at least the '#' token")
+
+    order = sorted(range(len(target_lists)), key=lambda b: (len(source_lists[b]), len(target_lists[b])))
+    results = [0.0] * len(order)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        distances = _edit_distance_batch([target_lists[b] for b in batch], [source_lists[b] for b in batch])
+        for b, distance in zip(batch, distances):
+            results[b] = distance
+    return results
+
+
+def _edit_distance_batch(target_lists: Sequence[List[str]], source_lists: Sequence[List[str]]) -> List[float]:
+    """Edit distance of every pair, computed cell by cell for all pairs at once.
+    A cell only depends on cells above and left of it, so padding the shorter lists does not change the results"""
+    num_pairs = len(target_lists)
+
+    # Number the tokens, so they can be compared as integers
+    vocabulary = {}
+    for tokens in list(target_lists) + list(source_lists):
+        for token in tokens:
+            vocabulary.setdefault(token, len(vocabulary))
+    classes = np.array([token_class(token) for token in vocabulary], dtype=np.int64)
+    substitution_costs = np.array(SUBSTITUTION_COSTS)
+
+    m = np.array([len(target) for target in target_lists])
+    n = np.array([len(source) for source in source_lists])
+    targets = np.full((num_pairs, m.max()), -1, dtype=np.int64)
+    sources = np.full((num_pairs, n.max()), -1, dtype=np.int64)
+    for b in range(num_pairs):
+        targets[b, :m[b]] = [vocabulary[token] for token in target_lists[b]]
+        sources[b, :n[b]] = [vocabulary[token] for token in source_lists[b]]
+    target_classes = classes[np.maximum(targets, 0)]
+
+    results = np.zeros(num_pairs)
+    pairs = np.arange(num_pairs)
+    previous = 3.0 * np.arange(m.max(), dtype=float)[None, :].repeat(num_pairs, axis=0)
+    done = n == 1
+    results[done] = previous[pairs[done], m[done] - 1]
+    for j in range(1, n.max()):
+        current = np.empty_like(previous)
+        current[:, 0] = 2.0 * j
+        source = sources[:, j]
+        source_costs = substitution_costs[(classes[np.maximum(source, 0)] * 8)[:, None] + target_classes]
+        last_row = j == n - 1
+        for i in range(1, m.max()):
+            minimum = np.minimum(np.minimum(current[:, i - 1], previous[:, i]), previous[:, i - 1])
+            inner = ~last_row | (i < m - 1)
+            if j > i:
+                cost = np.where(inner, 2.0, source_costs[:, i])
+            elif j < i:
+                cost = np.where(inner, 3.0, source_costs[:, i])
+            else:
+                cost = source_costs[:, i]
+            current[:, i] = minimum + np.where(source == targets[:, i], 0.0, cost)
+        previous = current
+        results[last_row] = previous[pairs[last_row], m[last_row] - 1]
+    return [round(float(result), 1) for result in results]
+
+
+def edit_distance_one_to_many(target_list: List[str], source_lists: Sequence[List[str]]) -> List[float]:
+    """Edit distance from every source list to the one target list"""
+    return _edit_distance_pairs([target_list] * len(source_lists), source_lists)
+
+
+def edit_distance_matrix(target_lists: Sequence[List[str]], source_lists: Sequence[List[str]]) -> List[List[float]]:
+    """Edit distance of every source list to every target list, as rows of targets and columns of sources"""
+    distances = _edit_distance_pairs([target for target in target_lists for _ in source_lists],
+                                     [source for _ in target_lists for source in source_lists])
+    width = len(source_lists)
+    return [distances[row * width:(row + 1) * width] for row in range(len(target_lists))]
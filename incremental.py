@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+# Keeping a json lines export up to date without rebuilding it. Only jokes that are new or changed (by link) are
+# tokenized and filtered again, so a daily refresh costs time proportional to the changes.
+#
+# Next to the export, outfile + ".manifest" stores a fingerprint of every joke and where its line is in the export:
+#   {"version": 1, "size": <size of the export>, "profanities": <sha1 of the profanity file>,
+#    "jokes": {link: [fingerprint, offset, length], ...}}
+# A changed joke is written over its old line if it fits, padded with spaces (json allows trailing whitespace).
+# Otherwise the old line is overwritten with spaces, which readers skip, and the joke is appended.
+# If the export does not have the size the manifest expects (it was written by something else, or an update was
+# interrupted) or the profanity file changed, the export is rebuilt from scratch. That needs the whole source, so
+# it is only done if the source is a file; for an iterable of rows a ValueError is raised and the export is kept.
+# Jokes that are no longer in the source stay in the export; save_jokes_json writes a fresh, compact copy.
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+from typing import List, Dict, Iterable, Union
+
+from joke import Joke, JokeGenerator
+from json_io import dumps_compact
+
+VERSION = 1
+
+
+def manifest_filename(outfile: str) -> str:
+    return outfile + ".manifest"
+
+
+def fingerprint(joke: Joke) -> str:
+    """Changes if any field of the joke changes"""
+    fields = "\x1f".join([joke.author, joke.link, joke.joke, str(joke.rating), joke.time])
+    return hashlib.blake2b(fields.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def profanity_hash(profanities: str) -> str:
+    with open(profanities, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def read_manifest(outfile: str, profanities: str) -> Dict:
+    """The manifest of the export, or an empty one if the export has to be rebuilt"""
+    empty = {"version": VERSION, "size": 0, "profanities": profanity_hash(profanities), "jokes": {}}
+    try:
+        with open(manifest_filename(outfile), "r") as file:
+            manifest = json.load(file)
+        size = os.path.getsize(outfile)
+    except (OSError, ValueError):
+        return empty
+    if manifest.get("version") != VERSION or manifest.get("size") != size \
+            or manifest.get("profanities") != empty["profanities"]:
+        return empty
+    return manifest
+
+
+def write_manifest(manifest: Dict, outfile: str) -> None:
+    """Replace the manifest at once, so it is never read half written"""
+    filename = manifest_filename(outfile)
+    with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(os.path.abspath(filename)), suffix=".tmp",
+                                     delete=False) as file:
+        json.dump(manifest, file)
+    os.replace(file.name, filename)
+
+
+def update_jsonl(source: Union[str, Iterable[List]], outfile: str, profanities: str = "profanities.txt") -> Dict:
+    """Bring the json lines export up to date with the source, a joke file or an iterable of raw rows
+    (for example only the rows that were added since the last update). Returns the number of added, updated
+    and unchanged jokes"""
+    manifest = read_manifest(outfile, profanities)
+    entries = manifest["jokes"]
+    if isinstance(source, str):
+        rows = JokeGenerator.iter_rows(source)
+    elif not entries and os.path.exists(outfile) and os.path.getsize(outfile):
+        # The rows might only be the latest ones, rebuilding from them would drop all the other jokes
+        raise ValueError("The manifest of " + outfile + " is stale, pass the full source file")
+    else:
+        rows = source
+    counts = {"added": 0, "updated": 0, "unchanged": 0}
+
+    # A new manifest means the export is started over
+    with open(outfile, "r+b" if entries else "wb") as export:
+        end = export.seek(0, os.SEEK_END)
+        for row in rows:
+            joke = Joke(row)
+            digest = fingerprint(joke)
+            entry = entries.get(joke.link)
+            if entry is not None and entry[0] == digest:
+                counts["unchanged"] += 1
+                continue
+
+            joke.filter_with(profanities)
+            line = dumps_compact(joke.json_repr)
+            if entry is None:
+                counts["added"] += 1
+            else:
+                counts["updated"] += 1
+                offset, length = entry[1], entry[2]
+                export.seek(offset)
+                if len(line) <= length:
+                    # The line keeps its length, so nothing after it moves
+                    export.write(line + b" " * (length - len(line)))
+                    entries[joke.link] = [digest, offset, length]
+                    continue
+                export.write(b" " * length)
+
+            export.seek(end)
+            export.write(line + b"\n")
+            entries[joke.link] = [digest, end, len(line)]
+            end += len(line) + 1
+
+    manifest["size"] = end
+    write_manifest(manifest, outfile)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add the new and changed jokes of a joke file to a json lines export")
+    parser.add_argument("source", help=".csv, .xml, .json or .jsonl file")
+    parser.add_argument("outfile", help="the .jsonl export, created if it does not exist")
+    parser.add_argument("--profanities", default="profanities.txt")
+    args = parser.parse_args()
+
+    counts = update_jsonl(args.source, args.outfile, args.profanities)
+    print(f"{counts['added']} added, {counts['updated']} updated, {counts['unchanged']} unchanged")
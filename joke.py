@@ -9,107 +9,245 @@
 # 			Mia Tatjana Egli (olatname: miaegl)
 # Matriculation Numbers: 21-700-406
 
+import asyncio
+import inspect
 import time
-from typing import List, Tuple, Dict
+import calendar
+import os
+import itertools
+from array import array
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Dict, Iterable, Iterator, Callable
 import re
 import random
 import csv
 from lxml import etree
 import json
 
+from dedupe import dedupe as dedupe_jokes
+from distance import edit_distance
+from profanity import get_profanity_matcher
+from profiling import profiler
+from joke_index import JokeIndex, index_filename
+from json_io import (iter_json_items, iter_json_lines, row_from_json, row_from_json_line, JsonObjectWriter,
+                     json_writer)
+from rating_index import RatingIndex
+from sampling import AliasTable, reservoir_sample
+
+
+SENTENCE_PATTERN = re.compile(r' ?([^.!?\n]+[.?!]*|\n)')
+TOKEN_PATTERN = re.compile(r'([\w\']+|\?|\.|\n|,|!)')
+
+# The nodes of a joke in the xml export, in this order. They have the same names as the keys of json_repr
+XML_TAGS = ("text", "author", "link", "rating", "time", "profanity_score")
+
+
+def split_and_tokenize(text: str) -> Tuple[List[str], List[List[str]]]:
+    """Split the text into sentences and tokenize them in the same pass"""
+    sentences = []
+    tokens = []
+    find_tokens = TOKEN_PATTERN.findall
+    for match in SENTENCE_PATTERN.finditer(text):
+        # Tokenize the sentence inside the text, without copying it first
+        start, end = match.span(1)
+        sentences.append(match.group(1))
+        tokens.append(find_tokens(text, start, end))
+    return sentences, tokens
+
+
+def tokenize_flat(text: str) -> Tuple[List[str], array]:
+    """Tokenize the text into one flat list. The sentence i are the tokens from offsets[i] to offsets[i + 1]"""
+    tokens = []
+    offsets = array("I", [0])
+    find_tokens = TOKEN_PATTERN.findall
+    for match in SENTENCE_PATTERN.finditer(text):
+        tokens.extend(find_tokens(text, *match.span(1)))
+        offsets.append(len(tokens))
+    return tokens, offsets
+
+
+# The tokenizer never produces this character, so it can separate the tokens
+TOKEN_SEPARATOR = "\x1f"
+
+
+def flatten(nested: List[List[str]]) -> Tuple[str, bytes]:
+    """The tokens of all sentences joined into one string, and the offsets where each sentence starts (plus
+    the end) as the bytes of an array("I"). Both are much faster to pickle than a list per sentence"""
+    offsets = array("I", [0])
+    for sentence in nested:
+        offsets.append(offsets[-1] + len(sentence))
+    return TOKEN_SEPARATOR.join(token for sentence in nested for token in sentence), offsets.tobytes()
+
+
+def unflatten(joined: str, offsets: bytes) -> List[List[str]]:
+    offsets = memoryview(offsets).cast("I")
+    tokens = joined.split(TOKEN_SEPARATOR) if offsets[-1] else []
+    return [tokens[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+class cached_slot:
+    """Like functools.cached_property, but keeps the value in a slot so it works for classes with __slots__"""
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner, name):
+        self.slot = "_cached_" + name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            value = self.func(instance)
+            setattr(instance, self.slot, value)
+            return value
+
+
+async def _emit(write: Callable[[str], object], line: str) -> None:
+    result = write(line)
+    if inspect.isawaitable(result):
+        await result
+
 
 class Joke:
     """The Joke object contains the joke, and some metadata on that joke. One can compare the jokes by upvotes"""
+    __slots__ = ("author", "link", "joke", "rating", "time",
+                 "_cached__split", "_cached__filtered", "_cached_num_profanities",
+                 "_cached_json_repr", "_packed")
+
     def __init__(self, raw_joke):
-        self.raw_joke = raw_joke
-        self.author = self.raw_joke[0]
-        self.link = self.raw_joke[1]
-        self.joke = self.raw_joke[2]
-        self.rating = int(self.raw_joke[3])
-        self.time = self.raw_joke[4]
-
-        self.sentences_joke = self.split_into_sentences()
-        self.tokenized_joke = self._tokenize()
-        self.filtered_joke = self.filter_profanity()[0]
-        self.num_profanities = self.filter_profanity()[1]
-
-        # TODO: Save representations in xml and json
-        self.joke_repr_x = self._get_xml_repr()
-        self.joke_repr_j = self._get_json_repr()
-        self.joke_repr_sj = ''                  # It is not that necessary
+        self.author = raw_joke[0]
+        self.link = raw_joke[1]
+        self.joke = raw_joke[2]
+        self.rating = int(raw_joke[3])
+        self.time = raw_joke[4]
+
+        # Rows read from the xml or json exports already contain the profanity score as an int
+        # (the rows of the csv file end with an empty column instead)
+        if len(raw_joke) > 5 and isinstance(raw_joke[5], int):
+            self._cached_num_profanities = raw_joke[5]
+
+    @property
+    def raw_joke(self) -> List:
+        return [self.author, self.link, self.joke, self.rating, self.time]
+
+    # The derived attributes are only computed on first access and then cached
+    @cached_slot
+    @profiler.timed("tokenize")
+    def _split(self) -> Tuple[List[str], List[List[str]]]:
+        if self._unpack():
+            return self._cached__split
+        sentences, tokens = split_and_tokenize(self.joke)
+        if profiler.enabled:
+            profiler.count("tokens_produced", sum(map(len, tokens)))
+        return sentences, tokens
+
+    @property
+    def sentences_joke(self) -> List[str]:
+        return self._split[0]
+
+    @property
+    def tokenized_joke(self) -> List[List[str]]:
+        return self._split[1]
+
+    @cached_slot
+    def _filtered(self) -> Tuple[List[List[str]], int]:
+        if self._unpack():
+            return self._cached__filtered
+        return self.filter_profanity()
+
+    @property
+    def filtered_joke(self) -> List[List[str]]:
+        return self._filtered[0]
+
+    @cached_slot
+    def num_profanities(self) -> int:
+        return self._filtered[1]
+
+    # json_repr is the only representation that is kept, the xml element and the json string are built from it
+    # when they are needed, and the exports write the fields directly
+    @cached_slot
+    def json_repr(self) -> Dict:
+        return self._get_json_repr()
+
+    @property
+    def xml_repr(self) -> etree.Element:
+        return self._get_xml_repr()
+
+    @property
+    def joke_repr_sj(self) -> str:
+        return json.dumps(self.json_repr, indent=2)
+
+    def to_record(self) -> Tuple:
+        """Get the fields and the processed text as a compact tuple, to send it to another process.
+        The sentences are sent as their spans in the text and the tokens as one string with the offsets of the
+        sentences. The filtered joke is left out if nothing was filtered, it is the tokenized joke then"""
+        packed = getattr(self, "_packed", None)
+        if packed is not None:
+            return (self.author, self.link, self.joke, self.rating, self.time, *packed)
+        filtered_joke, num_profanities = self._filtered
+        spans = array("I")
+        for match in SENTENCE_PATTERN.finditer(self.joke):
+            spans.extend(match.span(1))
+        return (self.author, self.link, self.joke, self.rating, self.time, spans.tobytes(),
+                *flatten(self.tokenized_joke), num_profanities, flatten(filtered_joke) if num_profanities else None)
+
+    @classmethod
+    def from_record(cls, record: Tuple) -> "Joke":
+        """Rebuild a Joke from to_record() without processing the text again. The sentences and tokens stay packed
+        until they are used, so rebuilding many jokes is cheap"""
+        joke = cls(record[:5])
+        joke._packed = record[5:]
+        joke._cached_num_profanities = record[8]
+        return joke
+
+    def _unpack(self) -> bool:
+        """Set the sentences, tokens and filtered tokens from the record the joke was built from, if there is one"""
+        packed = getattr(self, "_packed", None)
+        if packed is None:
+            return False
+        spans, tokens, offsets, num_profanities, filtered = packed
+        tokenized_joke = unflatten(tokens, offsets)
+        spans = memoryview(spans).cast("I")
+        self._cached__split = [self.joke[spans[i]:spans[i + 1]] for i in range(0, len(spans), 2)], tokenized_joke
+        self._cached__filtered = (unflatten(*filtered) if filtered else tokenized_joke), num_profanities
+        del self._packed
+        return True
 
     def split_into_sentences(self) -> List[str]:
         """Split text into sentences"""
-        output = re.findall(r' ?([^.!?\n]+[.?!]*|\n)', self.joke)
+        output = SENTENCE_PATTERN.findall(self.joke)
         return output
 
     def _tokenize(self) -> List[List[str]]:
         """Tokenize all the words in the sentences"""
         output = []
         for sentence in self.sentences_joke:
-            tokenized_sentence = re.findall(r'([\w\']+|\?|\.|\n|,|!)', sentence)
+            tokenized_sentence = TOKEN_PATTERN.findall(sentence)
             output.append(tokenized_sentence)
         return output
 
+    def tokenize_flat(self) -> Tuple[List[str], array]:
+        """All tokens of the joke in one list, plus the offsets where the sentences start"""
+        return tokenize_flat(self.joke)
+
+    @profiler.timed("profanity_filter")
     def filter_profanity(self, filename="profanities.txt") -> Tuple[List[List[str]], int]:
         """Filter out all the profanity"""
+        filtered_joke, num_profanities = get_profanity_matcher(filename).filter(self.tokenized_joke)
+        if profiler.enabled:
+            profiler.count("profanities_masked", num_profanities)
+        return filtered_joke, num_profanities
 
-        output = []
-
-        # Count number of profanities
-        num_profanities = 0
-
-        # Read in profanity file
-        with open(filename, "r")as file:
-            profanities = file.read().split("\n")
-
-        for sentence in self.tokenized_joke:
-            no_profanity = True
-            text_sentence = " ".join(sentence)
-            for profanity in profanities:
-
-                # Check if there is profanity in the sentence
-                if profanity in text_sentence:
-                    profanity_in_text = True
-                else:
-                    profanity_in_text = False
-
-                while profanity_in_text:
-                    num_profanities += 1
-                    no_profanity = False
-
-                    # Find the index of the profanity
-                    index = text_sentence.index(profanity)
-                    front = text_sentence[:index - 1]
-
-                    # Find the words that need to be replaced
-                    num_words_before_profanity = len(front.split(" "))
-                    num_profanity_words = len(profanity.split(" "))
-                    profanity_in_sentence = sentence[num_words_before_profanity: num_words_before_profanity + num_profanity_words]
-
-                    # Replace the profanity with '#'
-                    replacement = ["#" * len(word) for word in profanity_in_sentence]
-
-                    # Construct new sentence composed of the parts with and without profanity
-                    new_sent = []
-                    new_sent.extend(sentence[:num_words_before_profanity])
-                    new_sent.extend(replacement)
-                    new_sent.extend(sentence[num_words_before_profanity + len(replacement):])
-                    text_sentence = " ".join(new_sent)
-                    sentence = new_sent
-
-                    # Check if there is still profanity in the sentence
-                    if profanity in text_sentence:
-                        profanity_in_text = True
-
-                    else:
-                        profanity_in_text = False
-                        output.append(new_sent)
-
-            # Add sentence immediately if there are no profanities in the sentence
-            if no_profanity:
-                output.append(sentence)
-        return output, num_profanities
+    def filter_with(self, filename: str) -> None:
+        """Filter the joke with another profanity file than the default one, replacing the filtered joke and the
+        profanity score"""
+        self._cached__filtered = self.filter_profanity(filename)
+        self._cached_num_profanities = self._cached__filtered[1]
 
     def tell_joke(self):
         if len(self.filtered_joke) > 1:
@@ -122,6 +260,17 @@ class Joke:
         else:
             print(self.pretty_print(self.filtered_joke))
 
+    async def tell_joke_async(self, write: Callable[[str], object] = None, pause: float = 1.0) -> None:
+        """Like tell_joke, but waits for the punch line without blocking the event loop. Every line is passed to
+        write (print by default), which may be a coroutine function, for example the write and drain of a stream"""
+        write = write or print
+        if len(self.filtered_joke) > 1:
+            await _emit(write, self.pretty_print(self.filtered_joke[:-1]))
+            await asyncio.sleep(pause)
+            await _emit(write, self.pretty_print(self.filtered_joke[-1:]))
+        else:
+            await _emit(write, self.pretty_print(self.filtered_joke))
+
     @staticmethod
     def pretty_print(joke) -> str:
         """Print in a humanly readable way"""
@@ -130,19 +279,16 @@ class Joke:
             output += " ".join(sentence) + " "
         return output
 
+    @profiler.timed("xml_repr")
     def _get_xml_repr(self) -> etree.Element:
         """Get the xml representation of the Joke with all its attributes as nodes"""
+        fields = self.json_repr
         parent = etree.Element("joke")
-        etree.SubElement(parent, "text").text = self.joke
-        etree.SubElement(parent, "author").text = self.author
-        etree.SubElement(parent, "link").text = self.link
-        etree.SubElement(parent, "rating").text = str(self.rating)
-        etree.SubElement(parent, "time").text = self.time
-        etree.SubElement(parent, "profanity_score").text = str(self.num_profanities)
-        joke_bytes = etree.tostring(parent, encoding='utf-8')
-        joke = joke_bytes.decode('utf-8')
-        return joke
+        for tag in XML_TAGS:
+            etree.SubElement(parent, tag).text = str(fields[tag])
+        return parent
 
+    @profiler.timed("json_repr")
     def _get_json_repr(self) -> Dict:
         """Get the json representation of the Joke with all its attributes as nodes"""
         joke_hash = dict()
@@ -152,10 +298,7 @@ class Joke:
         joke_hash['rating'] = self.rating
         joke_hash['time'] = self.time
         joke_hash['profanity_score'] = self.num_profanities
-        joke = json.dumps(joke_hash, indent=2)
-        self.joke_repr_sj = joke
-        jj_dict = json.loads(joke)
-        return jj_dict
+        return joke_hash
 
     def __repr__(self):
         """Allows for printing"""
@@ -182,57 +325,368 @@ class Joke:
         return self.rating <= other.rating
 
 
+TIME_FORMAT = "%d.%m.%y %H:%M"
+
+
+def parse_time(text: str) -> int:
+    """Convert the time of a joke to seconds since the epoch"""
+    return calendar.timegm(time.strptime(text, TIME_FORMAT))
+
+
+def format_time(seconds: int) -> str:
+    """Convert seconds since the epoch back to the time format of the jokes"""
+    return time.strftime(TIME_FORMAT, time.gmtime(seconds))
+
+
+class JokeTable(Sequence):
+    """Columnar storage for a lot of jokes. The Joke objects are only created when a row is accessed"""
+    def __init__(self, rows: Iterable[List] = ()):
+        # Every author is stored once, the rows only keep the index into the pool
+        self.author_pool: List[str] = []
+        self._author_ids: Dict[str, int] = {}
+        self.authors = array("I")
+        self.links: List[str] = []
+        self.texts: List[str] = []
+        self.ratings = array("i")
+        # Seconds since the epoch
+        self.times = array("q")
+        self.extend(rows)
+
+    def append(self, raw_joke: List) -> None:
+        """Add a row in the same layout as the rows of the csv file"""
+        # Convert first, so a malformed row does not leave the columns with different lengths
+        rating = int(raw_joke[3])
+        posted = parse_time(raw_joke[4])
+        author = raw_joke[0]
+        if author not in self._author_ids:
+            self._author_ids[author] = len(self.author_pool)
+            self.author_pool.append(author)
+        self.authors.append(self._author_ids[author])
+        self.links.append(raw_joke[1])
+        self.texts.append(raw_joke[2])
+        self.ratings.append(rating)
+        self.times.append(posted)
+
+    def extend(self, rows: Iterable[List]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def row(self, index: int) -> List:
+        """Get the raw row at the index"""
+        return [self.author_pool[self.authors[index]], self.links[index], self.texts[index], self.ratings[index],
+                format_time(self.times[index])]
+
+    def __len__(self):
+        return len(self.ratings)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Joke(self.row(index))
+
+
+def write_joke_xml(xf: etree.xmlfile, fields: Dict, level: int = 0, indent: str = "  ") -> None:
+    """Write a joke straight from its json representation to the incremental writer, indented the same way as
+    etree.tostring(pretty_print=True). Empty fields are written as <tag/>"""
+    xf.write("\n" + indent * level)
+    with xf.element("joke"):
+        for tag in XML_TAGS:
+            xf.write("\n" + indent * (level + 1))
+            value = str(fields[tag])
+            if value:
+                with xf.element(tag):
+                    xf.write(value)
+            else:
+                xf.write(etree.Element(tag), with_tail=False)
+        xf.write("\n" + indent * level)
+
+
+def iter_xml_rows(infile) -> Iterator[List]:
+    """Yield the rows of the jokes in an xml file as written by save_jokes_xml, keeping only one joke in memory"""
+    for _, joke_node in etree.iterparse(infile, events=("end",), tag="joke"):
+        yield [joke_node.findtext("author"), joke_node.findtext("link"), joke_node.findtext("text"),
+               int(joke_node.findtext("rating")), joke_node.findtext("time"), int(joke_node.findtext("profanity_score"))]
+
+        # Free the joke and all the jokes before it, so the tree never grows
+        joke_node.clear(keep_tail=True)
+        while joke_node.getprevious() is not None:
+            del joke_node.getparent()[0]
+
+
+def _process_rows(rows: List, parse: Callable[[object], List] = None, profanities: str = None) -> List[Tuple]:
+    """Runs in the worker processes: process the jokes of one chunk. The caller has the rows already, so only the
+    processed part of the records is returned. If parse is given, the chunk contains unparsed lines and parse
+    turns each of them into a row, then the whole records are returned"""
+    output = []
+    for row in rows:
+        joke = Joke(parse(row) if parse is not None else row)
+        if profanities is not None:
+            joke.filter_with(profanities)
+        output.append(joke.to_record() if parse is not None else joke.to_record()[5:])
+    return output
+
+
+def iter_jokes_parallel(rows: Iterable, workers: int, chunk_size: int = 1000,
+                        parse: Callable[[object], List] = None, profanities: str = None) -> Iterator[Joke]:
+    """Build the jokes in a pool of processes, yielding them in the order of the rows"""
+    rows = iter(rows)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Only keep a few chunks per worker in flight, so a stream of rows is never read in completely
+        pending = deque()
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                pending.append((chunk, executor.submit(_process_rows, chunk, parse, profanities)))
+            if not pending:
+                return
+            chunk, future = pending.popleft()
+            if parse is not None:
+                for record in future.result():
+                    yield Joke.from_record(record)
+            else:
+                for row, processed in zip(chunk, future.result()):
+                    yield Joke.from_record((*row[:5], *processed))
+
+
+class JokeStream:
+    """Iterable over the jokes of a file. The file is read again every time, so only one joke is in memory at once"""
+    def __init__(self, filename: str, workers: int = None):
+        self.filename = filename
+        self.workers = workers
+
+    def __iter__(self) -> Iterator["Joke"]:
+        return JokeGenerator.iter_jokes(self.filename, self.workers)
+
+
 class JokeGenerator:
-    def __init__(self, filename="reddit_dadjokes.csv"):
+    def __init__(self, filename="reddit_dadjokes.csv", compact=False, stream=False, workers=None, cache=False,
+                 dedupe=False):
+        # With workers, the text of the jokes is processed in that many processes
+        # With cache, the jokes are read from a memory mapped binary cache next to the file (see joke_cache.py)
+        # With dedupe, only the best rated copy of reposted jokes is kept (see dedupe.py)
+        if dedupe and (cache or stream):
+            raise ValueError("dedupe needs all jokes in memory, it cannot be used with cache or stream")
         self.filename = filename
-        self.jokes = self.make_jokes_objects()
+        self.compact = compact
+        self.workers = workers
+        self.dedupe = dedupe
+        self._alias_table = None
+        self._rating_index = None
+        self._joke_index = None
+        # The saved index is stamped with the state of the file the jokes were read from, not with a later one
+        self._source_stat = os.stat(filename)
+        if cache:
+            # Imported here because joke_cache itself imports this module
+            from joke_cache import load_cached
+            self.jokes = load_cached(filename, workers=workers)
+        elif stream:
+            self.jokes = JokeStream(filename, workers)
+        else:
+            self.jokes = self.make_jokes_objects()
+
+    @staticmethod
+    def iter_rows(filename: str) -> Iterator[List]:
+        """Accept .csv, .xml, .json or .jsonl file, yield the raw rows of the jokes one at a time"""
+        rows = JokeGenerator._read_rows(filename)
+        if profiler.enabled:
+            # e.g. the stage "parse_csv" is the time spent in csv.reader
+            return profiler.iterate("parse_" + os.path.splitext(filename)[1].lstrip("."), rows, "rows_parsed")
+        return rows
+
+    @staticmethod
+    def _read_rows(filename: str) -> Iterator[List]:
+        if filename.endswith(".csv"):
+            with open(filename, "r") as infile:
+                yield from csv.reader(infile, delimiter=',')
+        elif filename.endswith(".xml"):
+            # lxml reads the encoding from the xml declaration, so the xml file is opened in binary mode
+            with open(filename, "rb") as infile:
+                yield from iter_xml_rows(infile)
+        elif filename.endswith(".json"):
+            with open(filename, "r", encoding="utf-8") as infile:
+                for _, json_joke in iter_json_items(infile):
+                    yield row_from_json(json_joke)
+        elif filename.endswith(".jsonl"):
+            with open(filename, "rb") as infile:
+                yield from map(row_from_json_line, iter_json_lines(infile))
+        else:
+            raise Warning('unsupported file type')
+
+    @classmethod
+    def iter_jokes(cls, filename: str, workers: int = None, profanities: str = None) -> Iterator[Joke]:
+        """Yield the jokes of the file one at a time, processed in parallel if workers are given.
+        If profanities is given, the jokes are filtered with that file instead of the default one"""
+        if workers and filename.endswith(".jsonl"):
+            # Every line is a joke, so the workers can parse the lines as well
+            with open(filename, "rb") as infile:
+                yield from iter_jokes_parallel(iter_json_lines(infile), workers, parse=row_from_json_line,
+                                               profanities=profanities)
+            return
+        if workers:
+            yield from iter_jokes_parallel(cls.iter_rows(filename), workers, profanities=profanities)
+            return
+        for row in cls.iter_rows(filename):
+            joke = Joke(row)
+            if profanities is not None:
+                joke.filter_with(profanities)
+            yield joke
 
     def make_jokes_objects(self):
-        """Accept .json or .csv file, generate Joke objects from them."""
-        with open(self.filename, "r") as infile:
-            if self.filename.endswith(".csv"):
-                lines = csv.reader(infile, delimiter=',')
-            else:
-                json_data = json.load(infile)
-                lines = []
-                for joke_id in json_data.keys():
-                    line = [json_data[joke_id][header] for header in json_data[joke_id].keys()]
-                    lines.append(line)
-            jokes = [Joke(row) for row in lines]
+        """Generate Joke objects from the file, or a JokeTable if the generator is compact"""
+        if self.compact:
+            # The table only keeps the fields, so there is nothing to process in parallel
+            jokes = JokeTable(self.iter_rows(self.filename))
+        else:
+            jokes = list(self.iter_jokes(self.filename, self.workers))
+        if not self.dedupe:
             return jokes
 
-    def generate_jokes(self):
-        for joke in self.jokes:
+        kept = dedupe_jokes(jokes)
+        if self.compact:
+            return JokeTable(jokes.row(position) for position in kept)
+        return [jokes[position] for position in kept]
+
+    def generate_jokes(self, jokes: Iterable[Joke] = None):
+        for joke in self.jokes if jokes is None else jokes:
             if len(joke.filtered_joke) > 1:
                 joke.tell_joke()
             time.sleep(10)
 
-    def random_joke(self):
-        joke = random.sample(self.jokes, 1)[0]
+    async def generate_jokes_async(self, jokes: Iterable[Joke] = None, write: Callable[[str], object] = None,
+                                   pause: float = 10.0, punch_line_pause: float = 1.0) -> None:
+        """Like generate_jokes, but with asyncio.sleep, so many feeds can run in one thread"""
+        for joke in self.jokes if jokes is None else jokes:
+            if len(joke.filtered_joke) > 1:
+                await joke.tell_joke_async(write, punch_line_pause)
+            await asyncio.sleep(pause)
+
+    def add_joke(self, raw_joke: List) -> None:
+        """Add a joke in the same layout as the rows of the csv file, keeping the indexes up to date"""
+        # Parse the time first, so a malformed row is rejected before the jokes and the indexes are changed
+        posted = parse_time(raw_joke[4])
+        if isinstance(self.jokes, JokeTable):
+            self.jokes.append(raw_joke)
+            joke = self.jokes[-1]
+        elif isinstance(self.jokes, list):
+            joke = Joke(raw_joke)
+            self.jokes.append(joke)
+        else:
+            raise TypeError("Jokes can only be added to a list or a JokeTable, not to " + type(self.jokes).__name__)
+        if self._rating_index is not None:
+            self._rating_index.add(joke.rating, posted)
+        if self._joke_index is not None:
+            self._joke_index.add(joke.tokenized_joke)
+
+    @property
+    def rating_index(self) -> RatingIndex:
+        """The jokes sorted by rating and time, built on first use"""
+        if self._rating_index is None:
+            if not isinstance(self.jokes, Sequence):
+                raise TypeError("A stream of jokes cannot be indexed")
+            # The columnar backends keep the ratings and times in arrays already
+            ratings = getattr(self.jokes, "ratings", None)
+            times = getattr(self.jokes, "times", None)
+            if ratings is None:
+                ratings = [joke.rating for joke in self.jokes]
+                times = [parse_time(joke.time) for joke in self.jokes]
+            self._rating_index = RatingIndex(ratings, times)
+        return self._rating_index
+
+    @property
+    def joke_index(self) -> JokeIndex:
+        """The full text index of the jokes, read from the file next to the jokes if it is up to date"""
+        if self._joke_index is None:
+            if not isinstance(self.jokes, Sequence):
+                raise TypeError("A stream of jokes cannot be indexed")
+            filename = index_filename(self.filename)
+            if os.path.exists(filename):
+                self._joke_index = JokeIndex.load(filename, self.filename)
+            if self._joke_index is None or len(self._joke_index) != len(self.jokes):
+                self._joke_index = JokeIndex.build(joke.tokenized_joke for joke in self.jokes)
+        return self._joke_index
+
+    def save_joke_index(self) -> None:
+        """Save the full text index next to the file of the jokes, so it does not have to be built again"""
+        self.joke_index.save(index_filename(self.filename), self.filename, self._source_stat)
+
+    def search(self, query: str, mode: str = "and") -> List[Joke]:
+        """Find the jokes that contain all words of the query ("and"), one of them ("or") or the exact phrase"""
+        tokens = [token for sentence in split_and_tokenize(query)[1] for token in sentence]
+        if mode == "and":
+            positions = self.joke_index.all_of(tokens)
+        elif mode == "or":
+            positions = self.joke_index.any_of(tokens)
+        elif mode == "phrase":
+            positions = self.joke_index.phrase(tokens, lambda position: self.jokes[position].tokenized_joke)
+        else:
+            raise ValueError("Unknown search mode " + repr(mode))
+        return [self.jokes[position] for position in positions]
+
+    def top_k(self, k: int) -> List[Joke]:
+        """The k jokes with the highest rating, best first"""
+        return [self.jokes[position] for position in self.rating_index.top_k(k)]
+
+    def rating_between(self, lo: int, hi: int) -> List[Joke]:
+        """All jokes with a rating from lo to hi, lowest rating first"""
+        return [self.jokes[position] for position in self.rating_index.rating_between(lo, hi)]
+
+    def newest(self, n: int) -> List[Joke]:
+        """The n most recent jokes, newest first"""
+        return [self.jokes[position] for position in self.rating_index.newest(n)]
+
+    def pick_joke(self, weighted: bool = False) -> Joke:
+        """Pick a random joke, with weighted the probability is proportional to the rating"""
+        if not isinstance(self.jokes, Sequence):
+            # A stream can only be sampled while reading it
+            return reservoir_sample(self.jokes, (lambda joke: joke.rating) if weighted else None)
+        if not weighted:
+            return self.jokes[random.randrange(len(self.jokes))]
+
+        # The alias table is built once, and again only if jokes were added since
+        if self._alias_table is None or len(self._alias_table) != len(self.jokes):
+            # The columnar backends keep the ratings in an array already
+            ratings = getattr(self.jokes, "ratings", None)
+            self._alias_table = AliasTable(ratings if ratings is not None else [joke.rating for joke in self.jokes])
+        return self.jokes[self._alias_table.pick()]
+
+    def random_joke(self, weighted: bool = False):
+        joke = self.pick_joke(weighted)
         joke.tell_joke()
 
-    def save_jokes_xml(self, outfile: str) -> None:
-        """Save all the jokes of the Generator in their xml representation to the outfile"""
-        with open(outfile, 'w', encoding='utf-8') as tf:
-            root = etree.Element("jokes")
-            for joke_obj in self.jokes:
-                parent = etree.fromstring(joke_obj.joke_repr_x.encode('utf-8'))
-                root.append(parent)
-            jokes = etree.tostring(root, encoding='UTF-8', pretty_print=True, xml_declaration=True).decode('utf-8')
-            tf.write(jokes)
+    @profiler.timed("save_xml")
+    def save_jokes_xml(self, outfile: str, jokes: Iterable[Joke] = None) -> None:
+        """Save all the jokes of the Generator (or the given jokes) in their xml representation to the outfile"""
+        jokes = iter(self.jokes if jokes is None else jokes)
+        first = next(jokes, None)
+        with open(outfile, 'wb') as tf:
+            with etree.xmlfile(tf, encoding='UTF-8') as xf:
+                xf.write_declaration()
+                if first is None:
+                    xf.write(etree.Element("jokes"))
+                else:
+                    with xf.element("jokes"):
+                        for joke_obj in itertools.chain([first], jokes):
+                            write_joke_xml(xf, joke_obj.json_repr, level=1)
+                        xf.write("\n")
+            tf.write(b"\n")
+            if profiler.enabled:
+                profiler.count("bytes_written", tf.tell())
         return None
 
-    def save_jokes_json(self, outfile: str) -> None:
-        """Save all the jokes of the Generator in their json representation to the outfile"""
-        with open(outfile, 'w') as tf:
-            jokes_hash = dict()
-            i = 0
-            for joke_obj in self.jokes:
-                # we didn't find "the indices (starting from 1) taken from the jokes attribute list"
-                # so we assigned a local variable i
-                i += 1
-                jokes_hash[i] = joke_obj.joke_repr_j
-            json.dump(jokes_hash, tf, indent=2)
+    @profiler.timed("save_json")
+    def save_jokes_json(self, outfile: str, jokes: Iterable[Joke] = None, json_format: str = None) -> None:
+        """Save all the jokes of the Generator (or the given jokes) in their json representation to the outfile.
+        json_format is "pretty", "compact" or "jsonl", by default "jsonl" for .jsonl files and "pretty" otherwise"""
+        if json_format is None:
+            json_format = "jsonl" if outfile.endswith(".jsonl") else "pretty"
+        with open(outfile, 'wb') as tf, json_writer(tf, json_format) as writer:
+            # The keys are the indices of the jokes, starting from 1
+            for i, joke_obj in enumerate(self.jokes if jokes is None else jokes, start=1):
+                writer.write(str(i), joke_obj.json_repr)
+        if profiler.enabled:
+            profiler.count("bytes_written", os.path.getsize(outfile))
         return None
 
 
@@ -244,48 +698,3 @@ if __name__ == "__main__":
 
     gen_json = gen = JokeGenerator("reddit_dadjokes.json")
     gen_json.random_joke()
-    
-    
-    
-    
-    
-def edit_distance(target_list: List[str], source_list: List[str]) -> int:
-    # imagine a matrix, the first row is "#" plus the target list
-    # the first column is "#" plus the source list
-    m = len(target_list)
-    n = len(source_list)
-    grid = {}
-    for j in range(n):
-        if j == 0:
-            for i in range(m):
-                if i == 0:
-                    grid[(j, i)] = 0
-                else:
-                    grid[(j, i)] = 3.0 * int(i)
-        else:
-            for i in range(m):
-                if i == 0:
-                    grid[(j, i)] = 2.0 * int(j)
-                else:
-                    left_neigh = grid[(j, i-1)]
-                    upper_neigh = grid[(j-1, i)]
-                    diagonal_neigh = grid[(j-1, i-1)]
-                    minimum = min(left_neigh, upper_neigh, diagonal_neigh)
-
-                    if source_list[j] == target_list[i]:
-                        grid[(j, i)] = minimum
-                    else:
-                        if ((j < n-1) or (i < m-1)) and (j > i):
-                            grid[(j, i)] = minimum + 2.0
-                        elif ((j < n-1) or (i < m-1)) and (j < i):
-                            grid[(j, i)] = minimum + 3.0
-                        else:
-                            if source_list[j].isdigit() and target_list[i].isdigit():
-                                grid[(j, i)] = minimum + 0.5
-                            elif (source_list[j] in string.punctuation) and (target_list[i] in string.punctuation):
-                                grid[(j, i)] = minimum + 0.1
-                            elif (not source_list[j].isascii()) or (not target_list[i].isascii()):
-                                grid[(j, i)] = minimum + 4.0
-                            else:
-                                grid[(j, i)] = minimum + 1.3
-    return round(grid[(n-1, m-1)], 1)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+# Binary cache of a joke file, so the jokes do not have to be parsed and filtered again on every start.
+#
+# Layout (little endian, every section starts at a multiple of 8):
+#   header      magic, version, number of jokes, size and mtime of the source file, sha1 of the profanity file
+#   sections    start offset of every column and string heap below
+#   rating      int32 per joke
+#   time        int64 per joke, seconds since the epoch
+#   score       int32 per joke, the number of profanities
+#   4 heaps     author, link, text, filtered text: uint64 offsets (one more than jokes), then the utf-8 data
+
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Sequence
+from typing import List, Iterable
+
+from joke import Joke, JokeGenerator, parse_time, format_time
+
+MAGIC = b"JOKECACH"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQQ20s")
+HEAPS = ("author", "link", "text", "filtered")
+SECTIONS = struct.Struct("<" + "Q" * (3 + 2 * len(HEAPS)))
+
+# Separators for the tokens and sentences of the filtered text, the tokenizer never produces them
+TOKEN_SEPARATOR = "\x1f"
+SENTENCE_END = "\x1e"
+
+
+def cache_filename(source: str) -> str:
+    return source + ".jokecache"
+
+
+def source_signature(source: str, profanities: str) -> tuple:
+    """Everything the cache depends on. If one of them changes, the cache is rebuilt"""
+    stat = os.stat(source)
+    with open(profanities, "rb") as file:
+        profanity_hash = hashlib.sha1(file.read()).digest()
+    return stat.st_size, stat.st_mtime_ns, profanity_hash
+
+
+def encode_filtered(filtered_joke: List[List[str]]) -> str:
+    return "".join(TOKEN_SEPARATOR.join(sentence) + SENTENCE_END for sentence in filtered_joke)
+
+
+def decode_filtered(text: str) -> List[List[str]]:
+    return [sentence.split(TOKEN_SEPARATOR) if sentence else [] for sentence in text.split(SENTENCE_END)[:-1]]
+
+
+def _pad(outfile) -> None:
+    outfile.write(b"\0" * (-outfile.tell() % 8))
+
+
+def _write_column(column: array, outfile) -> None:
+    """The columns are always stored little endian"""
+    if sys.byteorder != "little":
+        column = array(column.typecode, column)
+        column.byteswap()
+    column.tofile(outfile)
+
+
+def _read_column(view: memoryview, typecode: str):
+    """A column of the mapped file. On little endian machines it is a view of the file, otherwise a swapped copy"""
+    if sys.byteorder == "little":
+        return view.cast(typecode)
+    column = array(typecode, view.tobytes())
+    column.byteswap()
+    return column
+
+
+def write_cache(jokes: Iterable[Joke], cachefile: str, source: str, profanities: str = "profanities.txt") -> None:
+    """Write the jokes to the cache file. The file is replaced at once, so readers never see half a cache"""
+    # The signature is taken before the jokes are read, so a source that changes meanwhile invalidates the cache
+    size, mtime_ns, profanity_hash = source_signature(source, profanities)
+    ratings = array("i")
+    times = array("q")
+    scores = array("i")
+    offsets = [array("Q", [0]) for _ in HEAPS]
+    heaps = [tempfile.TemporaryFile() for _ in HEAPS]
+    directory = os.path.dirname(os.path.abspath(cachefile))
+    outfile = tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".tmp", delete=False)
+    try:
+        for joke in jokes:
+            ratings.append(joke.rating)
+            times.append(parse_time(joke.time))
+            scores.append(joke.num_profanities)
+            strings = (joke.author, joke.link, joke.joke, encode_filtered(joke.filtered_joke))
+            for string, heap, heap_offsets in zip(strings, heaps, offsets):
+                heap_offsets.append(heap_offsets[-1] + heap.write(string.encode("utf-8")))
+
+        with outfile:
+            outfile.write(HEADER.pack(MAGIC, VERSION, 0, len(ratings), size, mtime_ns, profanity_hash))
+            outfile.write(b"\0" * SECTIONS.size)
+
+            sections = []
+            for column in (ratings, times, scores):
+                _pad(outfile)
+                sections.append(outfile.tell())
+                _write_column(column, outfile)
+            for heap, heap_offsets in zip(heaps, offsets):
+                _pad(outfile)
+                sections.append(outfile.tell())
+                _write_column(heap_offsets, outfile)
+                sections.append(outfile.tell())
+                heap.seek(0)
+                shutil.copyfileobj(heap, outfile, 1 << 20)
+
+            outfile.seek(HEADER.size)
+            outfile.write(SECTIONS.pack(*sections))
+        os.replace(outfile.name, cachefile)
+    except BaseException:
+        outfile.close()
+        os.remove(outfile.name)
+        raise
+    finally:
+        for heap in heaps:
+            heap.close()
+
+
+def is_valid(cachefile: str, source: str, profanities: str = "profanities.txt") -> bool:
+    """Check that the cache exists, has the current version and was built from the current files"""
+    try:
+        with open(cachefile, "rb") as file:
+            header = file.read(HEADER.size)
+        magic, version, _, _, size, mtime_ns, profanity_hash = HEADER.unpack(header)
+        return (magic == MAGIC and version == VERSION
+                and (size, mtime_ns, profanity_hash) == source_signature(source, profanities))
+    except (OSError, struct.error):
+        return False
+
+
+class JokeCache(Sequence):
+    """The jokes of a cache file. The file is memory mapped, only the pages of the jokes that are read are loaded"""
+    def __init__(self, cachefile: str):
+        self.filename = cachefile
+        with open(cachefile, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self._count, _, _, _ = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(cachefile + " is not a joke cache of version " + str(VERSION))
+        sections = SECTIONS.unpack_from(self._mmap, HEADER.size)
+
+        view = memoryview(self._mmap)
+        count = self._count
+        self.ratings = _read_column(view[sections[0]:sections[0] + 4 * count], "i")
+        self.times = _read_column(view[sections[1]:sections[1] + 8 * count], "q")
+        self.scores = _read_column(view[sections[2]:sections[2] + 4 * count], "i")
+        self._heaps = []
+        for i in range(len(HEAPS)):
+            offsets_start, data_start = sections[3 + 2 * i], sections[4 + 2 * i]
+            self._heaps.append((_read_column(view[offsets_start:offsets_start + 8 * (count + 1)], "Q"), data_start))
+        view.release()
+
+    def string(self, heap: int, index: int) -> str:
+        """Read the string of one joke from one of the heaps (0: author, 1: link, 2: text, 3: filtered text)"""
+        offsets, start = self._heaps[heap]
+        return self._mmap[start + offsets[index]:start + offsets[index + 1]].decode("utf-8")
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("joke index out of range")
+
+        score = self.scores[index]
+        joke = Joke([self.string(0, index), self.string(1, index), self.string(2, index),
+                     self.ratings[index], format_time(self.times[index]), score])
+        joke._cached__filtered = (decode_filtered(self.string(3, index)), score)
+        return joke
+
+    def close(self) -> None:
+        for column in (self.ratings, self.times, self.scores):
+            column.release()
+        for offsets, _ in self._heaps:
+            offsets.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "JokeCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def load_cached(source: str, profanities: str = "profanities.txt", **kwargs) -> JokeCache:
+    """Open the cache of the source file, building it first if it is missing or out of date"""
+    cachefile = cache_filename(source)
+    if not is_valid(cachefile, source, profanities):
+        write_cache(JokeGenerator.iter_jokes(source, profanities=profanities, **kwargs), cachefile, source,
+                    profanities)
+    return JokeCache(cachefile)
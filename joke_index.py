@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+# Inverted index from the words of the jokes to the positions of the jokes that contain them.
+#
+# File layout (little endian):
+#   header      magic, version, number of jokes, number of words, size and mtime of the source file
+#   words       for every word: length of the utf-8 word, the word, number of jokes, length of the postings
+#   postings    for every word: the positions of its jokes as deltas to the previous one, as varints
+
+import heapq
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from typing import List, Dict, Iterable, Callable, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b"JOKEIDX\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQQ")
+WORD = struct.Struct("<HII")
+
+
+def normalize(token: str) -> Optional[str]:
+    """The form of a token in the index. Punctuation and line breaks are not indexed"""
+    if not any(char.isalnum() or char == "_" for char in token):
+        return None
+    return token.lower()
+
+
+def encode_postings(postings: array) -> bytes:
+    """Delta encode the sorted positions and write every delta as a varint"""
+    output = bytearray()
+    previous = 0
+    for position in postings:
+        delta = position - previous
+        previous = position
+        while delta >= 0x80:
+            output.append(delta & 0x7F | 0x80)
+            delta >>= 7
+        output.append(delta)
+    return bytes(output)
+
+
+def decode_postings(data: bytes, count: int) -> array:
+    if np is not None:
+        return _decode_postings_numpy(data, count)
+    postings = array("I")
+    position = 0
+    delta = 0
+    shift = 0
+    for byte in data:
+        delta |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        position += delta
+        postings.append(position)
+        delta = 0
+        shift = 0
+    if len(postings) != count:
+        raise ValueError("Corrupt posting list")
+    return postings
+
+
+def _decode_postings_numpy(data: bytes, count: int) -> array:
+    """decode_postings for all varints at once"""
+    data = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(data < 0x80)
+    if len(ends) != count or (len(data) and ends[-1] != len(data) - 1):
+        raise ValueError("Corrupt posting list")
+    postings = array("I")
+    if not count:
+        return postings
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # Every byte holds 7 bits of its varint, shifted by its place in the varint
+    shifts = 7 * (np.arange(len(data)) - np.repeat(starts, ends - starts + 1))
+    parts = (data & 0x7F).astype(np.uint64) << shifts.astype(np.uint64)
+    postings.frombytes(np.cumsum(np.add.reduceat(parts, starts)).astype(np.uint32).tobytes())
+    return postings
+
+
+def _as_array(positions) -> array:
+    output = array("I")
+    output.frombytes(positions.astype(np.uint32).tobytes())
+    return output
+
+
+def intersect(first: array, second: array) -> array:
+    """Positions that are in both sorted posting lists"""
+    if len(first) > len(second):
+        first, second = second, first
+    if np is not None:
+        short, long = np.frombuffer(first, dtype=np.uint32), np.frombuffer(second, dtype=np.uint32)
+        if not len(short):
+            return array("I")
+        if len(short) * 16 < len(long):
+            # Look up the few positions of the short list in the long one
+            found = np.minimum(np.searchsorted(long, short), len(long) - 1)
+            return _as_array(short[long[found] == short])
+        return _as_array(np.intersect1d(short, long, assume_unique=True))
+    output = array("I")
+    lo = 0
+    # Look up every position of the short list in the long one. The search only ever moves forward, and gallops
+    # ahead first, so it only looks at a small part of the long list
+    for position in first:
+        step = 1
+        hi = lo
+        while hi < len(second) and second[hi] < position:
+            lo = hi + 1
+            hi += step
+            step *= 2
+        lo = bisect_left(second, position, lo, min(hi + 1, len(second)))
+        if lo == len(second):
+            break
+        if second[lo] == position:
+            output.append(position)
+    return output
+
+
+def union(lists: List[array]) -> array:
+    """Positions that are in at least one of the sorted posting lists"""
+    if np is not None:
+        if not lists:
+            return array("I")
+        positions = np.concatenate([np.frombuffer(postings, dtype=np.uint32) for postings in lists])
+        # np.unique is much slower than sorting and dropping the repeated positions
+        positions.sort()
+        return _as_array(positions[np.concatenate(([True], positions[1:] != positions[:-1]))])
+    output = array("I")
+    for position in heapq.merge(*lists):
+        if not output or output[-1] != position:
+            output.append(position)
+    return output
+
+
+class JokeIndex:
+    """Inverted index over the tokenized jokes, supporting AND, OR and phrase queries"""
+    def __init__(self):
+        self.num_jokes = 0
+        self._postings: Dict[str, array] = {}
+        # Words of a loaded index stay encoded until they are queried, as slices of the memory mapped file
+        self._encoded: Dict[str, tuple] = {}
+        self._mmap = None
+
+    @classmethod
+    def build(cls, tokenized_jokes: Iterable[List[List[str]]]) -> "JokeIndex":
+        index = cls()
+        for tokenized_joke in tokenized_jokes:
+            index.add(tokenized_joke)
+        return index
+
+    def add(self, tokenized_joke: List[List[str]]) -> int:
+        """Add the next joke and return its position"""
+        position = self.num_jokes
+        self.num_jokes += 1
+        words = {normalize(token) for sentence in tokenized_joke for token in sentence}
+        words.discard(None)
+        for word in words:
+            postings = self.postings(word)
+            if not postings:
+                postings = self._postings[word] = array("I")
+            postings.append(position)
+        return position
+
+    def postings(self, word: str) -> array:
+        """The sorted positions of the jokes that contain the (normalized) word"""
+        if word in self._encoded:
+            self._postings[word] = decode_postings(*self._encoded.pop(word))
+        return self._postings.get(word, array("I"))
+
+    def __len__(self):
+        return self.num_jokes
+
+    def _words(self, tokens: Iterable[str]) -> List[str]:
+        return [word for word in map(normalize, tokens) if word is not None]
+
+    def all_of(self, tokens: Iterable[str]) -> List[int]:
+        """Positions of the jokes that contain all of the tokens"""
+        words = self._words(tokens)
+        if not words:
+            return []
+        # Start with the rarest word, so the intermediate results stay small
+        lists = sorted((self.postings(word) for word in set(words)), key=len)
+        output = lists[0]
+        for postings in lists[1:]:
+            if not output:
+                break
+            output = intersect(output, postings)
+        return output.tolist()
+
+    def any_of(self, tokens: Iterable[str]) -> List[int]:
+        """Positions of the jokes that contain at least one of the tokens"""
+        return union([self.postings(word) for word in set(self._words(tokens))]).tolist()
+
+    def phrase(self, tokens: Iterable[str], tokenized_joke: Callable[[int], List[List[str]]]) -> List[int]:
+        """Positions of the jokes where the tokens follow each other in one sentence.
+        The index does not store where in a joke a word is, so the jokes that contain all words are checked
+        with tokenized_joke(position)"""
+        words = self._words(tokens)
+        size = len(words)
+        output = []
+        for position in self.all_of(words):
+            for sentence in tokenized_joke(position):
+                sentence_words = self._words(sentence)
+                if any(sentence_words[i:i + size] == words for i in range(len(sentence_words) - size + 1)):
+                    output.append(position)
+                    break
+        return output
+
+    def save(self, filename: str, source: str, source_stat: os.stat_result = None) -> None:
+        """Write the index to the file, remembering the source file it was built from. source_stat should be the
+        os.stat of the source when the jokes were read from it, by default the source is assumed to be unchanged"""
+        stat = source_stat or os.stat(source)
+        words = sorted(set(self._postings) | set(self._encoded))
+        encoded = []
+        for word in words:
+            if word in self._encoded:
+                data, count = self._encoded[word]
+            else:
+                data, count = encode_postings(self._postings[word]), len(self._postings[word])
+            encoded.append((word.encode("utf-8"), data, count))
+
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, "wb") as outfile:
+            outfile.write(HEADER.pack(MAGIC, VERSION, 0, self.num_jokes, stat.st_size, stat.st_mtime_ns))
+            outfile.write(struct.pack("<Q", len(words)))
+            for word, data, count in encoded:
+                outfile.write(WORD.pack(len(word), count, len(data)))
+                outfile.write(word)
+            for _, data, _ in encoded:
+                outfile.write(data)
+        os.replace(tmp_filename, filename)
+
+    @classmethod
+    def load(cls, filename: str, source: str = None) -> Optional["JokeIndex"]:
+        """Read an index written by save. If the source file changed since, None is returned.
+        Only the words are read, the postings stay in the file until they are queried"""
+        with open(filename, "rb") as infile:
+            mapped = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(mapped)
+        magic, version, _, num_jokes, size, mtime_ns = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            return None
+        if source is not None:
+            stat = os.stat(source)
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                return None
+
+        index = cls()
+        index.num_jokes = num_jokes
+        index._mmap = mapped
+        offset = HEADER.size
+        num_words = struct.unpack_from("<Q", data, offset)[0]
+        offset += 8
+        words = []
+        for _ in range(num_words):
+            length, count, data_length = WORD.unpack_from(data, offset)
+            offset += WORD.size
+            words.append((str(data[offset:offset + length], "utf-8"), count, data_length))
+            offset += length
+        for word, count, data_length in words:
+            index._encoded[word] = (data[offset:offset + data_length], count)
+            offset += data_length
+        return index
+
+
+def index_filename(source: str) -> str:
+    return source + ".jokeindex"
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+# A joke feed over tcp: one loop tells the jokes with their pauses and every connected client receives every line.
+# Usage: python joke_server.py [--file reddit_dadjokes.csv] [--port 8765] [--pause 10]
+# and then, for as many clients as you like: nc localhost 8765
+
+import argparse
+import asyncio
+from typing import Set
+
+from joke import JokeGenerator
+
+
+class JokeFeed:
+    """Sends every line to all connected clients. Slow or disconnected clients are dropped"""
+    def __init__(self, timeout: float = 5.0):
+        self.clients: Set[asyncio.StreamWriter] = set()
+        self.timeout = timeout
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.clients.add(writer)
+        try:
+            # The clients do not send anything, reading only notices when they disconnect. Whatever they send
+            # anyway is thrown away
+            while await reader.read(4096):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(writer)
+            await self._close(writer)
+
+    @staticmethod
+    async def _close(writer: asyncio.StreamWriter, abort: bool = False) -> None:
+        if abort:
+            # Closing would wait until the client reads the rest of its buffer, which it might never do
+            writer.transport.abort()
+        else:
+            writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def _send(self, writer: asyncio.StreamWriter, data: bytes) -> None:
+        try:
+            writer.write(data)
+            await asyncio.wait_for(writer.drain(), self.timeout)
+        except (ConnectionError, asyncio.TimeoutError) as error:
+            self.clients.discard(writer)
+            await self._close(writer, abort=isinstance(error, asyncio.TimeoutError))
+
+    async def broadcast(self, line: str) -> None:
+        data = (line + "\n").encode("utf-8")
+        await asyncio.gather(*(self._send(writer, data) for writer in list(self.clients)))
+
+
+async def serve(gen: JokeGenerator, host: str, port: int, pause: float, punch_line_pause: float) -> None:
+    feed = JokeFeed()
+    server = await asyncio.start_server(feed.handle_client, host, port)
+    async with server:
+        print(f"Telling jokes on {host}:{port}")
+        while True:
+            lines = 0
+
+            async def write(line: str) -> None:
+                nonlocal lines
+                lines += 1
+                await feed.broadcast(line)
+
+            await gen.generate_jokes_async(write=write, pause=pause, punch_line_pause=punch_line_pause)
+            # Without any joke to tell, the loop would never wait and block the server
+            if not lines:
+                print("There are no jokes to tell")
+                return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tell jokes to every client that connects")
+    parser.add_argument("--file", default="reddit_dadjokes.csv")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pause", type=float, default=10.0, help="seconds between two jokes")
+    parser.add_argument("--punch-line-pause", type=float, default=1.0, help="seconds before the punch line")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(JokeGenerator(args.file), args.host, args.port, args.pause, args.punch_line_pause))
+    except KeyboardInterrupt:
+        pass
@@ -177,7 +177,8 @@ class JokeGenerator:
         elif self.filename.endswith('.json'):
             with open(self.filename, "r") as infile:
                 jokes_dict = json.load(infile)
-                return [Joke(list(joke.values())[:-1]) for joke in jokes_dict.values()]
+                fields = ('author', 'link', 'text', 'rating', 'time')
+                return [Joke([joke[field] for field in fields]) for joke in jokes_dict.values()]
         else:
             raise Warning('unsupported file type')
 
@@ -206,9 +207,6 @@ class JokeGenerator:
     def save_jokes_json(self, outfile: str) -> None:
         """Save all the jokes of the Generator in their json representation to the outfile"""
         jokes = {index+1: joke.json_repr for index, joke in enumerate(self.jokes)}
-        for index, joke in enumerate(self.jokes):
-            json_repr = joke.json_repr
-            jokes[index+1] = json_repr
         with open(outfile, 'w', encoding='utf-8') as file:
             json.dump(jokes, file, indent=4)
 
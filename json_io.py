@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+# Reading and writing the jokes as json. There are three formats:
+#   pretty   one json object with the jokes under the keys "1", "2", ..., indented by 2 (the original format)
+#   compact  the same object without any whitespace
+#   jsonl    json lines, one joke per line. The file can be appended to and split at any newline
+# The compact formats use orjson if it is installed, otherwise the json module. Both give the same bytes.
+
+import json
+import re
+from typing import List, Dict, Tuple, Iterator, BinaryIO, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_FORMATS = ("pretty", "compact", "jsonl")
+
+# The keys of a joke, in the order of the raw rows. The profanity score is optional, it can be computed again
+JSON_FIELDS = ("author", "link", "text", "rating", "time")
+
+
+def dumps_compact(value) -> bytes:
+    """The value as json without whitespace, encoded as utf-8"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data):
+    """Parse json from a str or utf-8 bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def row_from_json(json_joke: Dict) -> List:
+    """The raw row of a joke from its json representation, by key, so the order of the keys does not matter"""
+    return [json_joke[field] for field in JSON_FIELDS] + [json_joke.get("profanity_score")]
+
+
+def row_from_json_line(line: bytes) -> List:
+    return row_from_json(loads(line))
+
+
+def iter_json_lines(infile: BinaryIO) -> Iterator[bytes]:
+    """The non-empty lines of a json lines file"""
+    for line in infile:
+        if not line.isspace():
+            yield line
+
+
+_WHITESPACE = re.compile(r'\s*')
+
+
+def iter_json_items(infile, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, object]]:
+    """Yield the (key, value) pairs of the top level json object one at a time, without loading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+
+    def next_char() -> str:
+        """Skip the whitespace and return the next character, reading more of the file if necessary"""
+        nonlocal buffer, position
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position < len(buffer):
+                return buffer[position]
+            buffer, position = infile.read(chunk_size), 0
+            if not buffer:
+                raise ValueError("Unexpected end of the json file")
+
+    def next_value():
+        """Decode the next value, reading more of the file until it is complete"""
+        nonlocal buffer, position
+        next_char()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                value, end = None, None
+            # A value that ends with the buffer might continue in the next chunk
+            if end is None or end == len(buffer):
+                chunk = infile.read(chunk_size)
+                if chunk:
+                    buffer, position = buffer[position:] + chunk, 0
+                    continue
+                if end is None:
+                    raise ValueError("Invalid json value at the end of the file")
+            position = end
+            return value
+
+    if next_char() != "{":
+        raise ValueError("The json file does not contain an object")
+    position += 1
+    if next_char() == "}":
+        return
+    while True:
+        key = next_value()
+        if next_char() != ":":
+            raise ValueError("Expected ':' after the key " + repr(key))
+        position += 1
+        yield key, next_value()
+        separator = next_char()
+        position += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError("Expected ',' or '}' after the value of " + repr(key))
+
+
+class JsonObjectWriter:
+    """Write a json object item by item to a binary file, formatted like json.dump with an indent,
+    or without any whitespace if indent is None"""
+    def __init__(self, outfile: BinaryIO, indent: Optional[int] = 2):
+        self.outfile = outfile
+        self.indent = None if indent is None else " " * indent
+        self.empty = True
+
+    def __enter__(self) -> "JsonObjectWriter":
+        self.outfile.write(b"{")
+        return self
+
+    def write(self, key: str, value) -> None:
+        if self.indent is None:
+            self.outfile.write((b"" if self.empty else b",") + dumps_compact(key) + b":" + dumps_compact(value))
+        else:
+            # json.dumps escapes the newlines inside strings, so every newline starts a new line of the output
+            dumped = json.dumps(value, indent=len(self.indent)).replace("\n", "\n" + self.indent)
+            item = ("\n" if self.empty else ",\n") + self.indent + json.dumps(key) + ": " + dumped
+            self.outfile.write(item.encode("utf-8"))
+        self.empty = False
+
+    def __exit__(self, *exc_info) -> None:
+        self.outfile.write(b"}" if self.empty or self.indent is None else b"\n}")
+
+
+class JsonLinesWriter:
+    """Write one value per line. The keys are not written, the position of a line is its key"""
+    def __init__(self, outfile: BinaryIO):
+        self.outfile = outfile
+
+    def __enter__(self) -> "JsonLinesWriter":
+        return self
+
+    def write(self, key: str, value) -> None:
+        self.outfile.write(dumps_compact(value) + b"\n")
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+def json_writer(outfile: BinaryIO, json_format: str = "pretty"):
+    """The writer for one of the JSON_FORMATS"""
+    if json_format == "pretty":
+        return JsonObjectWriter(outfile)
+    if json_format == "compact":
+        return JsonObjectWriter(outfile, indent=None)
+    if json_format == "jsonl":
+        return JsonLinesWriter(outfile)
+    raise ValueError("Unknown json format " + repr(json_format) + ", expected one of " + ", ".join(JSON_FORMATS))
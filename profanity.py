@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+from typing import List, Tuple, Dict, Iterator
+
+
+class ProfanityMatcher:
+    """Aho-Corasick automaton over a list of profanities. Built once per word list and shared by all jokes"""
+    def __init__(self, profanities: List[str]):
+        # Keep the order of the list, it decides which profanity wins if two of them overlap
+        self.profanities = tuple(profanities)
+        self.widths = tuple(len(profanity.split(" ")) for profanity in self.profanities)
+
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+
+        # Build the trie, one state per prefix of a profanity
+        for index, profanity in enumerate(self.profanities):
+            if not profanity:
+                continue
+            state = 0
+            for char in profanity:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append(index)
+
+        # Add the failure links breadth first, so the failure state of a node is always finished before the node
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                outputs[next_state].extend(outputs[fail[next_state]])
+
+        self._goto = tuple(goto)
+        self._fail = tuple(fail)
+        self._outputs = tuple(tuple(output) for output in outputs)
+
+    @classmethod
+    def from_file(cls, filename: str) -> "ProfanityMatcher":
+        """Read in the profanity file, one profanity per line"""
+        with open(filename, "r") as file:
+            return cls(file.read().split("\n"))
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (start, profanity index) for every occurrence of a profanity in the text"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in outputs[state]:
+                yield position - len(self.profanities[index]) + 1, index
+
+    def filter(self, tokenized_joke: List[List[str]]) -> Tuple[List[List[str]], int]:
+        """Replace all the profanities in the tokenized joke with '#' and count them"""
+        output = []
+        num_profanities = 0
+
+        for sentence in tokenized_joke:
+            text_sentence = " ".join(sentence)
+
+            # Map the character offset of every word to its position in the sentence
+            word_starts = {}
+            offset = 0
+            for position, word in enumerate(sentence):
+                word_starts[offset] = position
+                offset += len(word) + 1
+
+            # Only matches that start at the beginning of a word are profanities
+            matches: Dict[int, List[int]] = {}
+            for start, index in self._scan(text_sentence):
+                if start in word_starts:
+                    matches.setdefault(index, []).append(word_starts[start])
+
+            if not matches:
+                output.append(sentence)
+                continue
+
+            new_sent = list(sentence)
+            masked = [False] * len(sentence)
+            for index in sorted(matches):
+                found = False
+                for position in matches[index]:
+                    words = range(position, position + self.widths[index])
+
+                    # Skip matches that overlap a profanity which is already replaced
+                    if any(masked[word] for word in words):
+                        continue
+                    for word in words:
+                        new_sent[word] = "#" * len(new_sent[word])
+                        masked[word] = True
+                    num_profanities += 1
+                    found = True
+
+                # As before, the sentence is added once for every profanity found in it
+                if found:
+                    output.append(list(new_sent))
+
+        return output, num_profanities
+
+
+_matchers: Dict[str, ProfanityMatcher] = {}
+
+
+def get_profanity_matcher(filename: str = "profanities.txt") -> ProfanityMatcher:
+    """Return the shared matcher for the profanity file, reading the file only the first time"""
+    if filename not in _matchers:
+        _matchers[filename] = ProfanityMatcher.from_file(filename)
+    return _matchers[filename]
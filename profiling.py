@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+# Timers and counters for the stages of the joke pipeline. They are off by default; while they are off, every
+# instrumented call only checks profiler.enabled.
+#
+#   from profiling import profiler
+#   profiler.enable()
+#   ... load and save jokes ...
+#   print(profiler.snapshot())
+#
+# Only the current process is measured, work done in the workers of JokeGenerator(workers=...) is not counted.
+#
+# The stages nest (saving a joke computes its json_repr, which tokenizes and filters it), but every stage only gets
+# the time not spent in the stages inside it. So the times add up: save_xml and save_json are the time spent
+# serializing and writing, json_repr the time spent building the dictionaries, and so on. The exports write the
+# jokes from their json_repr, so xml_repr is only measured when Joke.xml_repr is used directly.
+
+import functools
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, TextIO
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self._dumper = None
+        # The dumper thread reads the dictionaries while they are updated
+        self._lock = threading.Lock()
+        # The stages that are running in each thread, as [start, time spent in the stages inside it]
+        self._local = threading.local()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.seconds.clear()
+            self.calls.clear()
+            self.counters.clear()
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.seconds[stage] += seconds
+            self.calls[stage] += 1
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] += amount
+
+    def _start(self) -> None:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append([time.perf_counter(), 0.0])
+
+    def _stop(self, stage: str) -> None:
+        stack = self._local.stack
+        start, inner = stack.pop()
+        total = time.perf_counter() - start
+        if stack:
+            stack[-1][1] += total
+        self.add_time(stage, total - inner)
+
+    def timed(self, stage: str):
+        """Decorator that adds the time spent in the function (but not in the stages it calls) to the stage"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                self._start()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._stop(stage)
+            return wrapper
+        return decorator
+
+    def iterate(self, stage: str, items: Iterable, counter: str = None) -> Iterator:
+        """Pass the items on, adding the time spent producing them (not the time spent using them) to the stage"""
+        items = iter(items)
+        while True:
+            self._start()
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                self._stop(stage)
+            if counter:
+                self.count(counter)
+            yield item
+
+    def snapshot(self) -> Dict:
+        """The current timers and counters, as a dictionary that can be saved as json"""
+        with self._lock:
+            return {
+                "stages": {stage: {"calls": self.calls[stage], "seconds": seconds}
+                           for stage, seconds in self.seconds.items()},
+                "counters": dict(self.counters),
+            }
+
+    def start_dumping(self, interval: float = 10.0, outfile: TextIO = sys.stderr) -> None:
+        """Write a snapshot as one line of json to the outfile every interval seconds, until stop_dumping"""
+        self.stop_dumping()
+        stop = threading.Event()
+
+        def dump():
+            while not stop.wait(interval):
+                outfile.write(json.dumps(self.snapshot()) + "\n")
+                outfile.flush()
+
+        thread = threading.Thread(target=dump, daemon=True)
+        thread.start()
+        self._dumper = (stop, thread)
+
+    def stop_dumping(self) -> None:
+        if self._dumper is not None:
+            stop, thread = self._dumper
+            stop.set()
+            thread.join()
+            self._dumper = None
+
+
+# The profiler that Joke and JokeGenerator report to
+profiler = Profiler()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Iterable, Tuple
+
+
+def _sorted_columns(values: Iterable[int], typecode: str) -> Tuple[array, array]:
+    """Sort the values, return them together with their original positions"""
+    pairs = sorted((value, position) for position, value in enumerate(values))
+    return array(typecode, (value for value, _ in pairs)), array("I", (position for _, position in pairs))
+
+
+class RatingIndex:
+    """Positions of the jokes sorted by rating and by time. Jokes can be added without sorting everything again"""
+    def __init__(self, ratings: Iterable[int] = (), times: Iterable[int] = ()):
+        # Jokes with the same rating or time are kept in the order they were added
+        self.ratings, self.rating_positions = _sorted_columns(ratings, "i")
+        self.times, self.time_positions = _sorted_columns(times, "q")
+        if len(self.ratings) != len(self.times):
+            raise ValueError("There has to be one rating and one time for every joke")
+
+    def __len__(self):
+        return len(self.ratings)
+
+    def add(self, rating: int, time: int) -> int:
+        """Add the next joke and return its position"""
+        position = len(self)
+        index = bisect_right(self.ratings, rating)
+        self.ratings.insert(index, rating)
+        self.rating_positions.insert(index, position)
+        index = bisect_right(self.times, time)
+        self.times.insert(index, time)
+        self.time_positions.insert(index, position)
+        return position
+
+    def top_k(self, k: int) -> List[int]:
+        """Positions of the k jokes with the highest rating, best first"""
+        k = max(0, min(k, len(self)))
+        return self.rating_positions[len(self) - k:].tolist()[::-1]
+
+    def rating_between(self, lo: int, hi: int) -> List[int]:
+        """Positions of the jokes with lo <= rating <= hi, lowest rating first"""
+        return self.rating_positions[bisect_left(self.ratings, lo):bisect_right(self.ratings, hi)].tolist()
+
+    def newest(self, n: int) -> List[int]:
+        """Positions of the n most recent jokes, newest first"""
+        n = max(0, min(n, len(self)))
+        return self.time_positions[len(self) - n:].tolist()[::-1]
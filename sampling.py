@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+import random
+from array import array
+from typing import Iterable, TypeVar, Callable, Optional
+
+T = TypeVar("T")
+
+
+class AliasTable:
+    """Walker's alias method: after building the table in O(n), every weighted pick is O(1)"""
+    def __init__(self, weights: Iterable[float]):
+        weights = [max(weight, 0) for weight in weights]
+        total = sum(weights)
+        if total <= 0:
+            raise ValueError("At least one weight has to be positive")
+
+        n = len(weights)
+        self.probabilities = array("d", [0.0]) * n
+        self.aliases = array("I", [0]) * n
+
+        # Scale the weights so they average to 1, then pair every small bucket with a large one
+        scaled = [weight * n / total for weight in weights]
+        small = [i for i, weight in enumerate(scaled) if weight < 1]
+        large = [i for i, weight in enumerate(scaled) if weight >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probabilities[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] += scaled[less] - 1
+            (small if scaled[more] < 1 else large).append(more)
+        # What is left is 1 up to rounding errors
+        for i in small + large:
+            self.probabilities[i] = 1.0
+            self.aliases[i] = i
+
+    def __len__(self):
+        return len(self.probabilities)
+
+    def pick(self, rng: random.Random = random) -> int:
+        """Pick an index with a probability proportional to its weight"""
+        i = int(rng.random() * len(self.probabilities))
+        return i if rng.random() < self.probabilities[i] else self.aliases[i]
+
+
+def reservoir_sample(items: Iterable[T], weight: Optional[Callable[[T], float]] = None,
+                     rng: random.Random = random) -> T:
+    """Pick one item of a stream in a single pass, uniformly or with a probability proportional to its weight"""
+    chosen = None
+    total = 0
+    for item in items:
+        item_weight = 1 if weight is None else max(weight(item), 0)
+        total += item_weight
+        # Replace the chosen item with the probability of the new item among all seen so far
+        if item_weight and rng.random() * total < item_weight:
+            chosen = item
+    if total <= 0:
+        raise ValueError("Cannot sample from an empty stream or a stream without positive weights")
+    return chosen
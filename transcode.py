@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# University of Zurich
+# Department of Computational Linguistics
+
+# Authors: Cui Ding(olatname: cding)
+# Matriculation Numbers: 21-718-945
+# 			Mia Tatjana Egli (olatname: miaegl)
+# Matriculation Numbers: 21-700-406
+
+# Converting text files of unknown encoding to utf-8, chunk by chunk.
+# The incremental decoders keep multibyte sequences that are split between two chunks, so the chunks can be
+# cut anywhere.
+
+import argparse
+import codecs
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, BinaryIO, Optional
+
+CHUNK_SIZE = 1 << 20
+
+# The umask can only be read by setting it, which would race with other threads creating files, so it is read once
+UMASK = os.umask(0o022)
+os.umask(UMASK)
+SAMPLE_SIZE = 1 << 16
+
+BOMS = [
+    # The utf-32 little endian BOM starts with the utf-16 one, so it has to be checked first
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def detect_encoding(filename: str, sample_size: int = SAMPLE_SIZE) -> str:
+    """Guess the encoding from the beginning of the file: a BOM, then utf-8, otherwise ISO 8859-1.
+    Only the sample is checked, so a file can still turn out not to be utf-8 further on"""
+    with open(filename, "rb") as infile:
+        sample = infile.read(sample_size)
+        truncated = bool(infile.read(1))
+
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # If the sample ends inside a multibyte character, that character is left out
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=not truncated)
+        return "utf-8"
+    except UnicodeDecodeError:
+        # Every byte is a valid character in ISO 8859-1, so this always works
+        return "iso-8859-1"
+
+
+def transcode(infile: BinaryIO, outfile: BinaryIO, encoding: str, chunk_size: int = CHUNK_SIZE) -> int:
+    """Convert the infile from the encoding to utf-8, one chunk at a time. Returns the number of bytes read"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    encoder = codecs.getincrementalencoder("utf-8")()
+    num_bytes = 0
+    while True:
+        chunk = infile.read(chunk_size)
+        num_bytes += len(chunk)
+        outfile.write(encoder.encode(decoder.decode(chunk, final=not chunk)))
+        if not chunk:
+            outfile.write(encoder.encode("", final=True))
+            return num_bytes
+
+
+def transcode_detected(infile: BinaryIO, outfile: BinaryIO, encoding: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """Like transcode, for an encoding from detect_encoding: if the file is not utf-8 after all (past the sample
+    that was checked), the file is converted again as ISO 8859-1. Returns the encoding that was used"""
+    start = outfile.tell()
+    try:
+        transcode(infile, outfile, encoding, chunk_size)
+        return encoding
+    except UnicodeDecodeError:
+        if encoding != "utf-8":
+            raise
+    infile.seek(0)
+    outfile.seek(start)
+    outfile.truncate()
+    transcode(infile, outfile, "iso-8859-1", chunk_size)
+    return "iso-8859-1"
+
+
+@contextmanager
+def replace_when_done(outfile: str):
+    """Open a temporary file next to the outfile, which replaces the outfile only if everything was written"""
+    directory = os.path.dirname(os.path.abspath(outfile))
+    output = tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".tmp", delete=False)
+    try:
+        with output:
+            yield output
+        # Temporary files are only readable by their owner, the outfile gets the mode a new file would get
+        os.chmod(output.name, 0o666 & ~UMASK)
+    except BaseException:
+        os.remove(output.name)
+        raise
+    os.replace(output.name, outfile)
+
+
+def transcode_file(infile: str, outfile: str, encoding: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> str:
+    """Convert one file to utf-8. The encoding is detected if it is not given. Returns the encoding"""
+    return concatenate([infile], outfile, [encoding] if encoding else None, chunk_size)[0]
+
+
+def concatenate(infiles: List[str], outfile: str, encodings: Optional[List[str]] = None,
+                chunk_size: int = CHUNK_SIZE, separator: str = "") -> List[str]:
+    """Convert all infiles to utf-8 and write them one after the other to the outfile, with the separator between
+    them. The encodings are detected if they are not given. Returns the encoding of every file"""
+    detect = encodings is None
+    used = []
+    with replace_when_done(outfile) as output:
+        for i, infile in enumerate(infiles):
+            if i:
+                output.write(separator.encode("utf-8"))
+            with open(infile, "rb") as input_file:
+                if detect:
+                    used.append(transcode_detected(input_file, output, detect_encoding(infile), chunk_size))
+                else:
+                    transcode(input_file, output, encodings[i], chunk_size)
+                    used.append(encodings[i])
+    return used
+
+
+def transcode_to(infile: str, outfile: str, chunk_size: int = CHUNK_SIZE) -> Dict:
+    """Convert one file to utf-8 and report what was done. The outfile only appears once it is complete"""
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(os.path.abspath(outfile)), exist_ok=True)
+    with replace_when_done(outfile) as output, open(infile, "rb") as input_file:
+        encoding = transcode_detected(input_file, output, detect_encoding(infile), chunk_size)
+        bytes_read = input_file.tell()
+        bytes_written = output.tell()
+    return {"file": infile, "encoding": encoding, "bytes_read": bytes_read, "bytes_written": bytes_written,
+            "seconds": time.perf_counter() - start}
+
+
+def _transcode_job(job: tuple) -> Dict:
+    """Runs in the worker processes. Errors are reported instead of stopping the whole batch"""
+    infile, outfile = job
+    try:
+        return transcode_to(infile, outfile)
+    except (OSError, UnicodeError) as error:
+        return {"file": infile, "encoding": None, "bytes_read": 0, "bytes_written": 0, "seconds": 0.0,
+                "error": str(error)}
+
+
+def transcode_tree(source_dir: str, target_dir: str, workers: Optional[int] = None,
+                   suffixes: tuple = (".txt",)) -> List[Dict]:
+    """Convert every file with one of the suffixes below source_dir to utf-8, keeping the directory structure in
+    target_dir. The files are converted in a pool of processes. Returns one report per file"""
+    jobs = []
+    for directory, _, filenames in os.walk(source_dir):
+        for filename in sorted(filenames):
+            if filename.endswith(suffixes):
+                infile = os.path.join(directory, filename)
+                jobs.append((infile, os.path.join(target_dir, os.path.relpath(infile, source_dir))))
+
+    # Many small files: hand them to the workers in batches so the overhead per file stays low
+    chunksize = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_transcode_job, jobs, chunksize=chunksize))
+
+
+def format_report(reports: List[Dict]) -> str:
+    lines = [f"{'file':<40} {'encoding':<12} {'bytes read':>12} {'bytes written':>14} {'seconds':>9}  error"]
+    for report in reports:
+        encoding = report["encoding"] or "-"
+        lines.append(f"{report['file']:<40} {encoding:<12} {report['bytes_read']:>12} {report['bytes_written']:>14} "
+                     f"{report['seconds']:>9.4f}  {report.get('error', '')}".rstrip())
+    total = sum(report["bytes_read"] for report in reports)
+    lines.append(f"{len(reports)} files, {total} bytes read")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert all text files of a directory tree to utf-8")
+    parser.add_argument("source_dir")
+    parser.add_argument("target_dir")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--suffix", action="append", help="file suffixes to convert (default: .txt)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    reports = transcode_tree(args.source_dir, args.target_dir, args.workers, tuple(args.suffix or [".txt"]))
+    print(format_report(reports))
+    print(f"{time.perf_counter() - start:.2f} seconds")